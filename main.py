@@ -1,19 +1,35 @@
+import asyncio
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from src.database import OrmMethods
-from src.services import parse_data
+from src.database.config import settings
+from src.services import parse_data, file_catalog
+from src.services.xml_parser import index_data_files
+from src.services.sqlite_export import build_from_manifests
 from src.router import router_api, router_stream
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await OrmMethods.delete_tables()
-    await OrmMethods.create_tables()
-    print("The database is cleaned and ready to go")
-    await parse_data()
-    print("Date parsed successfully")
+    if settings.STORAGE_BACKEND == 'sqlite':
+        if settings.SQLITE_BUILD_ON_STARTUP:
+            await build_from_manifests(settings.SQLITE_PATH)
+            print("The SQLite database is built from the manifests")
+        else:
+            index_data_files()
+            print("Using the prebuilt SQLite database")
+    else:
+        await OrmMethods.delete_tables()
+        await OrmMethods.create_tables()
+        print("The database is cleaned and ready to go")
+        await parse_data()
+        print("Date parsed successfully")
+    catalog_task = asyncio.create_task(file_catalog.run())
     yield
+    catalog_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await catalog_task
     print("Shutdown")
 
 
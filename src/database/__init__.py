@@ -0,0 +1 @@
+from .queries import OrmMethods
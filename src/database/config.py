@@ -1,12 +1,48 @@
+from typing import Literal
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: str
-    DB_HOST: str
-    DB_PORT: int
-    POSTGRES_DB: str
+    # Required by the 'postgres' storage backend only
+    POSTGRES_USER: str | None = None
+    POSTGRES_PASSWORD: str | None = None
+    DB_HOST: str | None = None
+    DB_PORT: int | None = None
+    POSTGRES_DB: str | None = None
+    # Storage of the catalog data, 'sqlite' serves the lookups from an embedded read-only database
+    STORAGE_BACKEND: Literal['postgres', 'sqlite'] = 'postgres'
+    SQLITE_PATH: str = 'catalog.sqlite3'
+    SQLITE_MMAP_SIZE: int = 256*1024*1024
+    SQLITE_BUILD_ON_STARTUP: bool = True
+    FILE_CATALOG_REFRESH_INTERVAL: float = 30.0
+    # Stream scheduler, rates are in bytes per second, 0 means unlimited
+    STREAM_MAX_ACTIVE: int = 32
+    STREAM_MAX_QUEUED: int = 128
+    STREAM_QUEUE_TIMEOUT: float = 30.0
+    STREAM_RETRY_AFTER: int = 5
+    STREAM_MAX_PER_CLIENT: int = 4
+    STREAM_CLIENT_RATE: int = 0
+    STREAM_CLIENT_BURST: int = 1024*1024
+    STREAM_TOTAL_RATE: int = 0
+    # Peers allowed to forward the client IP in X-Real-IP, addresses or networks like '172.16.0.0/12'
+    STREAM_TRUSTED_PROXIES: list[str] = []
+    # Valid values of the X-API-Key header, a client with a valid key is limited per key instead of per IP
+    STREAM_API_KEYS: set[str] = set()
+    # Weights of the API keys (listed in STREAM_API_KEYS) in the sharing of STREAM_TOTAL_RATE, other clients weigh 1
+    STREAM_CLIENT_WEIGHTS: dict[str, float] = {}
+
+    @model_validator(mode='after')
+    def check_postgres_settings(self):
+        """
+        Require the Postgres connection settings when the 'postgres' storage backend is selected.
+        """
+        if self.STORAGE_BACKEND == 'postgres':
+            missing = [name for name in ('POSTGRES_USER', 'POSTGRES_PASSWORD', 'DB_HOST', 'DB_PORT', 'POSTGRES_DB')
+                       if getattr(self, name) is None]
+            if missing:
+                raise ValueError(f"{', '.join(missing)} required by the 'postgres' storage backend")
+        return self
 
     @property
     def db_url_asyncpg(self):
@@ -1,17 +1,33 @@
 from typing import Annotated
+from functools import cache
 from sqlalchemy import String
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
 from src.database.config import settings
 
 
-engine = create_async_engine(
-    url=settings.db_url_asyncpg,
-    echo=True,
-)
+@cache
+def get_engine() -> AsyncEngine:
+    """
+    Create the Postgres engine on first use, so the 'sqlite' storage backend runs without asyncpg and Postgres.
+    """
+    return create_async_engine(
+        url=settings.db_url_asyncpg,
+        echo=True,
+    )
+
+
+@cache
+def _get_session_maker() -> async_sessionmaker:
+    return async_sessionmaker(get_engine(), expire_on_commit=False)
 
-session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+def session_factory() -> AsyncSession:
+    """
+    Create a new session of the Postgres database.
+    """
+    return _get_session_maker()()
 
 # Create a custom type annotation for string fields limited to 256 characters.
 str_256 = Annotated[str, 256]
@@ -1,14 +1,34 @@
 import datetime
 
 from typing import Annotated
-from sqlalchemy import ForeignKey, text
+from sqlalchemy import ForeignKey, DateTime
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.expression import FunctionElement
 
 from src.database.database import Base, str_256
 
 
+class utcnow(FunctionElement):
+    """
+    Current UTC timestamp, rendered for each database the models are created in.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, 'postgresql')
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', now())"
+
+
+@compiles(utcnow, 'sqlite')
+def _sqlite_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
 intpk = Annotated[int, mapped_column(primary_key=True)]
-created_at = Annotated[datetime.datetime, mapped_column(server_default=text("TIMEZONE('utc', now())"))]
+created_at = Annotated[datetime.datetime, mapped_column(server_default=utcnow())]
 
 
 class DateOrm(Base):
@@ -1,6 +1,6 @@
 from sqlalchemy import select, and_
 from sqlalchemy.orm import joinedload, load_only
-from src.database.database import engine, session_factory, Base
+from src.database.database import get_engine, session_factory, Base
 from src.database.models import ExchangeOrm, InstrumentOrm
 
 
@@ -11,7 +11,7 @@ class OrmMethods:
         Asynchronously create all tables in the database using metadata.
         This should be called to initialize the database schema.
         """
-        async with engine.connect() as conn:
+        async with get_engine().connect() as conn:
             await conn.run_sync(Base.metadata.create_all)
             await conn.commit()
 
@@ -21,7 +21,7 @@ class OrmMethods:
         Asynchronously drop all tables in the database.
         This will remove all data and the schema from the database.
         """
-        async with engine.connect() as conn:
+        async with get_engine().connect() as conn:
             await conn.run_sync(Base.metadata.drop_all)
             await conn.commit()
 
@@ -51,16 +51,23 @@ class OrmMethods:
         :return: A list of found data items.
         """
         async with session_factory() as session:
-            instrument_load_list = [InstrumentOrm.name, InstrumentOrm.iid, InstrumentOrm.storage_type]
-            query = (select(InstrumentOrm)
-                     .join(InstrumentOrm.exchange)
-                     .join(ExchangeOrm.date)
-                     .options(joinedload(InstrumentOrm.exchange)
-                              .load_only(ExchangeOrm.name)
-                              )
-                     .options(load_only(*instrument_load_list))
-                     .filter(and_(*search_conditions))
-                     )
-
-            result = await session.execute(query)
+            result = await session.execute(OrmMethods.find_data_query(search_conditions))
             return result.scalars().all()
+
+    @staticmethod
+    def find_data_query(search_conditions: list):
+        """
+        Build the query of find_data, shared by all the storage backends.
+        :param search_conditions: A list of conditions to filter the data.
+        :return: A select statement of the instruments with their exchange names.
+        """
+        instrument_load_list = [InstrumentOrm.name, InstrumentOrm.iid, InstrumentOrm.storage_type]
+        return (select(InstrumentOrm)
+                .join(InstrumentOrm.exchange)
+                .join(ExchangeOrm.date)
+                .options(joinedload(InstrumentOrm.exchange)
+                         .load_only(ExchangeOrm.name)
+                         )
+                .options(load_only(*instrument_load_list))
+                .filter(and_(*search_conditions))
+                )
@@ -0,0 +1,118 @@
+import os
+import asyncio
+from sqlalchemy import create_engine, event, insert, select, Engine
+from sqlalchemy.orm import Session
+
+from src.database.config import settings
+from src.database.database import Base
+from src.database.queries import OrmMethods
+
+
+def _create_sqlite_engine(path: str, read_only: bool) -> Engine:
+    """
+    Create an engine for the SQLite database file, tuned for the read-only catalog lookups.
+    :param path: The file path of the SQLite database.
+    :param read_only: Open the file in read-only mode, queries that write are rejected.
+    """
+    if read_only:
+        url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    else:
+        url = f"sqlite:///{path}"
+    sqlite_engine = create_engine(url=url)
+
+    @event.listens_for(sqlite_engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return sqlite_engine
+
+
+sqlite_engine = _create_sqlite_engine(settings.SQLITE_PATH, read_only=True)
+
+
+class SqliteOrmMethods:
+    """
+    Read-only storage backend answering the same lookups as OrmMethods from an embedded SQLite database.
+    The database is built with SqliteBuilder, from the manifests or from Postgres.
+    """
+    @staticmethod
+    async def find_data(search_conditions: list):
+        """
+        Asynchronously find data in the SQLite database based on specified search conditions.
+        The blocking SQLite work (connecting, reading memory-mapped pages) runs in a worker thread.
+        :param search_conditions: A list of conditions to filter the data.
+        :return: A list of found data items.
+        """
+        return await asyncio.to_thread(SqliteOrmMethods._find_data, search_conditions)
+
+    @staticmethod
+    def _find_data(search_conditions: list):
+        with Session(sqlite_engine) as session:
+            result = session.execute(OrmMethods.find_data_query(search_conditions))
+            return result.scalars().all()
+
+
+class SqliteBuilder:
+    """
+    Build a SQLite database for SqliteOrmMethods.
+    The data is written to a temporary file which replaces the database once it is complete.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._tmp_path = f"{path}.tmp"
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._engine = _create_sqlite_engine(self._tmp_path, read_only=False)
+
+    def create_tables(self):
+        """
+        Create all tables in the database and switch it to the WAL journal mode for the build.
+        """
+        with self._engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            Base.metadata.create_all(conn)
+            conn.commit()
+
+    async def add_new_data(self, model, attributes):
+        """
+        Add new data to the database if it does not already exist, the same way as OrmMethods.add_new_data.
+        :param model: The ORM model class to which the data should be added.
+        :param attributes: A dictionary of attributes to be set on the new model instance.
+        :return: The ID of the new data.
+        """
+        with Session(self._engine) as session:
+            with session.begin():
+                data = session.execute(select(model).filter_by(**attributes)).scalars().first()
+                if data is None:
+                    new_data = model(**attributes)
+                    session.add(new_data)
+                    session.flush()  # Fix changes to get an id of a new data
+                    return new_data.id
+
+    def add_rows(self, model, rows: list[dict]):
+        """
+        Insert rows as they are, primary keys included.
+        :param model: The ORM model class of the rows.
+        :param rows: A list of dictionaries of column values.
+        """
+        if not rows:
+            return
+        with Session(self._engine) as session:
+            with session.begin():
+                session.execute(insert(model), rows)
+
+    def finish(self):
+        """
+        Checkpoint the WAL into the database file and move the file in place of the database.
+        The file is switched back to the rollback journal: a WAL database needs its '-shm' file,
+        which read-only connections cannot create in a read-only directory.
+        """
+        with self._engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA journal_mode=DELETE")
+        self._engine.dispose()
+        os.replace(self._tmp_path, self._path)
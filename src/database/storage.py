@@ -0,0 +1,7 @@
+from src.database.config import settings
+from src.database.queries import OrmMethods
+from src.database.sqlite_queries import SqliteOrmMethods
+
+
+# The storage backend answering the lookups, selected by settings.STORAGE_BACKEND
+storage = SqliteOrmMethods if settings.STORAGE_BACKEND == 'sqlite' else OrmMethods
@@ -1,8 +1,12 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends
-from starlette.responses import StreamingResponse
-from src.services.file_streaming import configure_stream_response
-from src.schema import StreamSchema
+from fastapi import APIRouter, Depends, Request
+from starlette.responses import Response, StreamingResponse
+from src.services.file_streaming import (configure_stream_response,
+                                         configure_head_response,
+                                         get_file_metadata,
+                                         )
+from src.services.stream_scheduler import stream_scheduler, get_client_key
+from src.schema import StreamSchema, FileFilterSchema, FileMetadata, StreamStats
 
 
 router_stream = APIRouter(tags=['Stream'])
@@ -10,7 +14,29 @@ router_stream = APIRouter(tags=['Stream'])
 
 @router_stream.get("/stream")
 async def stream_binary_file(
+        attr: Annotated[StreamSchema, Depends()],
+        request: Request,
+):
+    s_attr = attr.model_dump()
+    return StreamingResponse(**await configure_stream_response(s_attr, get_client_key(request)))
+
+
+@router_stream.head("/stream")
+async def stream_binary_file_head(
         attr: Annotated[StreamSchema, Depends()]
 ):
     s_attr = attr.model_dump()
-    return StreamingResponse(**await configure_stream_response(s_attr))
+    return Response(**await configure_head_response(s_attr))
+
+
+@router_stream.get("/stream/metadata")
+async def stream_file_metadata(
+        attr: Annotated[FileFilterSchema, Depends()]
+) -> FileMetadata:
+    s_attr = attr.model_dump()
+    return FileMetadata(**await get_file_metadata(s_attr))
+
+
+@router_stream.get("/stream/stats")
+async def stream_stats() -> StreamStats:
+    return StreamStats(**stream_scheduler.stats())
@@ -27,7 +27,29 @@ class IidToIsinFilterSchema(BaseModel):
     iid: int
 
 
-class StreamSchema(BaseModel):
+class FileFilterSchema(BaseModel):
     date: datetime.date
     filename: str
+
+
+class StreamSchema(FileFilterSchema):
     chunk: conint(gt=4*1024, le=512*1024) = 32*1024
+
+
+class FileMetadata(BaseModel):
+    filename: str
+    size: int
+    mtime: datetime.datetime
+    record_size: int | None
+    record_count: int | None
+    checksum_algorithm: str
+    checksum: str | None
+
+
+class StreamStats(BaseModel):
+    active: int
+    queued: int
+    throttled: int
+    clients: int
+    rejected_total: int
+    throttled_total: int
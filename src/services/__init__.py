@@ -0,0 +1,2 @@
+from .xml_parser import parse_data
+from .file_catalog import file_catalog
@@ -1,14 +1,22 @@
 from typing import Any
-from src.database.queries import OrmMethods
+from src.database.storage import storage
 from src.database.models import DateOrm, ExchangeOrm, InstrumentOrm
 
 
-async def data_search(search_params: dict[str, Any]):
+async def data_search(search_params: dict[str, Any], backend=storage):
     """
     Asynchronous function to search for data based on various filters.
     :param search_params: A dictionary with column names as keys (e.g., 'date', 'instrument')
      and filter values as values. Missing or None values are ignored in the search.
-    :return: returns database results meeting 'validated_data' criteria via OrmMethods.find_data.
+    :param backend: The storage backend to search in, the one selected in the settings by default.
+    :return: returns database results meeting 'validated_data' criteria via the backend's find_data.
+    """
+    return await backend.find_data(create_search_conditions(search_params))
+
+
+def create_search_conditions(search_params: dict[str, Any]) -> list:
+    """
+    Create the filter conditions of data_search from the search parameters.
     """
     criteria = {
         DateOrm.date: search_params.get('date'),
@@ -23,4 +31,4 @@ async def data_search(search_params: dict[str, Any]):
     if search_params.get('date_to'):
         conditions.append(DateOrm.date <= search_params.get('date_to'))
 
-    return await OrmMethods.find_data(conditions)
+    return conditions
@@ -0,0 +1,197 @@
+import os
+import json
+import base64
+import asyncio
+import hashlib
+import datetime
+from email.utils import formatdate
+from dataclasses import dataclass, replace
+
+from src.database.config import settings
+
+
+DATA_DIR = 'data'
+# A record is a 10 KiB block with a 4 byte slot reserved for the levels, each level takes 4 bytes
+# (see Payload in task/generate_bin.py).
+_RECORD_BLOCK_SIZE = 10 * 1024
+_LEVEL_SIZE = 4
+CHECKSUM_ALGORITHM = 'sha256'
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass(slots=True, frozen=True)
+class FileMeta:
+    path: str
+    size: int
+    mtime_ns: int
+    record_size: int | None
+    record_count: int | None
+    checksum: str | None = None
+
+    @property
+    def mtime(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.mtime_ns / 1e9, tz=datetime.timezone.utc)
+
+    @property
+    def etag(self) -> str:
+        """
+        Strong ETag once the checksum is known, weak one based on size and mtime before that.
+        """
+        if self.checksum is not None:
+            return f'"{self.checksum}"'
+        return f'W/"{self.size:x}-{self.mtime_ns:x}"'
+
+    @property
+    def digest(self) -> str | None:
+        """
+        Value for the 'Digest' header (RFC 3230), None while the checksum is not computed yet.
+        """
+        if self.checksum is None:
+            return None
+        return f'sha-256={base64.b64encode(bytes.fromhex(self.checksum)).decode()}'
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.mtime_ns / 1e9, usegmt=True)
+
+
+class FileCatalog:
+    """
+    In-memory catalog of the '.dat' files in the data directory.
+    Lookups never touch the filesystem, the catalog is kept fresh by a background task
+    which re-checks file mtimes and computes the missing checksums.
+    """
+    def __init__(self, root_dir: str = DATA_DIR):
+        self._root_dir = root_dir
+        self._files: dict[str, FileMeta] = {}
+
+    def register(self, path: str, record_size: int | None = None) -> FileMeta | None:
+        """
+        Stat the file and add it to the catalog, an entry with unchanged size and mtime is kept as is.
+        :param path: The path to the '.dat' file.
+        :param record_size: The size of a record in bytes, if None the previously known one is kept.
+        :return: The catalog entry, or None if the file is gone.
+        """
+        path = os.path.normpath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._files.pop(path, None)
+            return None
+        return self.update(path, stat, record_size)
+
+    def update(self, path: str, stat: os.stat_result, record_size: int | None = None) -> FileMeta:
+        """
+        Add the file to the catalog from a stat result taken by the caller, e.g. 'fstat' of an open file.
+        An entry with unchanged size and mtime is kept as is.
+        :param path: The path to the '.dat' file.
+        :param stat: The stat result of the file.
+        :param record_size: The size of a record in bytes, if None the previously known one is kept.
+        :return: The catalog entry.
+        """
+        path = os.path.normpath(path)
+        meta = self._files.get(path)
+        if record_size is None and meta is not None:
+            record_size = meta.record_size
+        if (meta is None
+                or meta.size != stat.st_size
+                or meta.mtime_ns != stat.st_mtime_ns
+                or meta.record_size != record_size):
+            meta = FileMeta(
+                path=path,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                record_size=record_size,
+                record_count=stat.st_size // record_size if record_size else None,
+            )
+            self._files[path] = meta
+        return meta
+
+    def get(self, path: str) -> FileMeta | None:
+        """
+        Return the catalog entry of the file without any filesystem access.
+        """
+        return self._files.get(os.path.normpath(path))
+
+    async def run(self):
+        """
+        Keep the catalog fresh: compute missing checksums, then periodically rescan the data directory.
+        Meant to be run as a background task for the lifetime of the application, errors are printed
+        and the refresh goes on.
+        """
+        while True:
+            try:
+                await self._compute_checksums()
+            except Exception as e:
+                print(f'Error computing checksums of the file catalog: {e!r}')
+            await asyncio.sleep(settings.FILE_CATALOG_REFRESH_INTERVAL)
+            try:
+                await self._rescan()
+            except Exception as e:
+                print(f'Error rescanning the file catalog: {e!r}')
+
+    async def _rescan(self):
+        """
+        Pick up new and modified files and drop the removed ones.
+        The filesystem is walked in a worker thread, the catalog is only changed on the event loop.
+        """
+        stats = await asyncio.to_thread(self._scan)
+        for path in self._files.keys() - stats.keys():
+            del self._files[path]
+        for path, stat in stats.items():
+            self.update(path, stat)
+
+    def _scan(self) -> dict[str, os.stat_result]:
+        """
+        Walk the data directory and stat the '.dat' files.
+        :return: The stat results by normalized path.
+        """
+        stats = {}
+        for subdir, dirs, files in os.walk(self._root_dir):
+            for filename in files:
+                if filename.endswith('.dat'):
+                    path = os.path.normpath(os.path.join(subdir, filename))
+                    try:
+                        stats[path] = os.stat(path)
+                    except OSError:
+                        continue  # Removed while walking
+        return stats
+
+    async def _compute_checksums(self):
+        for meta in list(self._files.values()):
+            if meta.checksum is not None:
+                continue
+            try:
+                checksum = await asyncio.to_thread(_hash_file, meta.path)
+            except OSError as e:
+                print(f'Error computing checksum of {meta.path}: {e}')
+                continue
+            # The file may have been changed or removed by a rescan while hashing
+            if self._files.get(meta.path) is meta:
+                self._files[meta.path] = replace(meta, checksum=checksum)
+
+
+def record_size_from_levels(levels: str | None) -> int | None:
+    """
+    Compute the record size of a '.dat' file from the 'Levels' attribute of its manifest entry.
+    :param levels: The levels as written in the manifest, e.g. '[0, 1, 2, 3]'.
+    :return: The size of one record in bytes, or None if the levels are not a list.
+    """
+    try:
+        return _RECORD_BLOCK_SIZE + _LEVEL_SIZE * (len(json.loads(levels)) - 1)
+    except (ValueError, TypeError):
+        return None
+
+
+def _hash_file(path: str) -> str:
+    """
+    Compute the hex checksum of the file, reading it in blocks.
+    """
+    file_hash = hashlib.new(CHECKSUM_ALGORITHM)
+    with open(path, 'rb') as file:
+        while block := file.read(_HASH_BLOCK_SIZE):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+file_catalog = FileCatalog()
@@ -1,62 +1,161 @@
 import os
+import asyncio
 import datetime
 import aiofiles
 from typing import Any, AsyncGenerator
 from fastapi import HTTPException
+from starlette.background import BackgroundTask
+from src.services.file_catalog import file_catalog, FileMeta, CHECKSUM_ALGORITHM
+from src.services.stream_scheduler import stream_scheduler, StreamTicket
 
 
-async def configure_stream_response(request_data: dict[str, Any]) -> dict[str, Any]:
+async def configure_stream_response(request_data: dict[str, Any], client_key: str) -> dict[str, Any]:
     """
     Prepares parameters for a StreamingResponse based on validated data.
+    Waits for the stream scheduler to admit the stream, raises 429 or 503 if it is rejected.
     :param request_data: Dictionary of validated data needed for setting up the response.
-    :return: Dictionary with 'content' and 'headers' keys, ready to be used in a StreamingResponse.
+    :param client_key: The key identifying the client for the stream scheduler.
+    :return: Dictionary with 'content', 'headers' and 'background' keys, ready to be used in a StreamingResponse.
     """
     chunk_size = request_data.get('chunk')
-    date_as_path = request_data.get('date')
-    filename = request_data.get('filename')
-    file_path = _create_file_path(date_as_path, filename)
-    file_size = os.path.getsize(file_path)
-    headers = {
-        'Content-Length': str(file_size),
-        'Content-Disposition': f'attachment; filename="{os.path.basename(file_path)}"',
-    }
-    content = _read_file_in_chunks(file_path, chunk_size)
+    file_meta = _get_file_meta(request_data)
+    ticket = await stream_scheduler.admit(client_key)
+    try:
+        file, file_meta = await _open_file(file_meta)
+    except BaseException:
+        ticket.release()
+        raise
+    content = _read_file_in_chunks(file, file_meta.size, chunk_size, ticket)
 
     return {
         'content': content,
-        'headers': headers,
+        'headers': _create_headers(file_meta),
+        # Releases the slot and the file if the response ends before the content is read
+        'background': BackgroundTask(_close_stream, file, ticket),
     }
 
 
-def _create_file_path(date_as_path: datetime.date, filename: str) -> str:
+async def configure_head_response(request_data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Prepares parameters for a bodiless Response to a HEAD request, headers match the ones of the stream.
+    :param request_data: Dictionary of validated data needed for setting up the response.
+    :return: Dictionary with 'headers' key, ready to be used in a Response.
+    """
+    file_meta = _get_file_meta(request_data)
+    return {
+        'headers': _create_headers(file_meta),
+    }
+
+
+async def get_file_metadata(request_data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Collects the catalog metadata of the requested file.
+    :param request_data: Dictionary of validated data with 'date' and 'filename' keys.
+    :return: Dictionary of file metadata, ready to be validated by the FileMetadata schema.
+    """
+    file_meta = _get_file_meta(request_data)
+    return {
+        'filename': os.path.basename(file_meta.path),
+        'size': file_meta.size,
+        'mtime': file_meta.mtime,
+        'record_size': file_meta.record_size,
+        'record_count': file_meta.record_count,
+        'checksum_algorithm': CHECKSUM_ALGORITHM,
+        'checksum': file_meta.checksum,
+    }
+
+
+def _get_file_meta(request_data: dict[str, Any]) -> FileMeta:
+    """
+    Look up the requested file in the file catalog, raise error if it is not there.
+    """
+    file_path = _create_file_path(request_data.get('date'), request_data.get('filename'))
+    file_meta = file_catalog.get(file_path)
+    if file_meta is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return file_meta
+
+
+def _create_headers(file_meta: FileMeta) -> dict[str, str]:
+    """
+    Create response headers describing the file content.
+    """
+    headers = {
+        'Content-Length': str(file_meta.size),
+        'Content-Disposition': f'attachment; filename="{os.path.basename(file_meta.path)}"',
+        'ETag': file_meta.etag,
+        'Last-Modified': file_meta.last_modified,
+    }
+    if file_meta.digest is not None:
+        headers['Digest'] = file_meta.digest
+    return headers
+
+
+async def _open_file(file_meta: FileMeta):
     """
-    Asynchronously create file path and check if file exists, raise error if not.
+    Open the file and check it against the catalog entry with a single 'fstat' in the aiofiles thread.
+    A file changed since the last rescan is updated in the catalog, so the headers match the opened file.
+    :return: The opened file and its up-to-date catalog entry.
     """
-    file_path = os.path.join('data',
-                             str(date_as_path.year),
-                             str(date_as_path.month),
-                             str(date_as_path.day),
-                             filename
-                             )
-    if not os.path.exists(file_path):
+    try:
+        file = await aiofiles.open(file_meta.path, 'rb')
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
-    return file_path
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while reading the file: {e}")
+
+    try:
+        stat = await asyncio.get_running_loop().run_in_executor(None, os.fstat, file.fileno())
+    except BaseException:
+        await file.close()
+        raise
+    if stat.st_size != file_meta.size or stat.st_mtime_ns != file_meta.mtime_ns:
+        file_meta = file_catalog.update(file_meta.path, stat)
+    return file, file_meta
+
+
+async def _close_stream(file, ticket: StreamTicket):
+    ticket.release()
+    await file.close()
+
+
+def _create_file_path(date_as_path: datetime.date, filename: str) -> str:
+    """
+    Create file path from the date and the filename.
+    """
+    return os.path.join('data',
+                        str(date_as_path.year),
+                        str(date_as_path.month),
+                        str(date_as_path.day),
+                        filename
+                        )
 
 
-async def _read_file_in_chunks(file_path: str, chunk_size: int) -> AsyncGenerator[bytes, Any]:
+async def _read_file_in_chunks(file,
+                               size: int,
+                               chunk_size: int,
+                               ticket: StreamTicket,
+                               ) -> AsyncGenerator[bytes, Any]:
     """
-    Asynchronously read a file in chunks of a specified size.
+    Asynchronously read an opened file in chunks of a specified size, each chunk is paced by the stream scheduler.
+    Exactly 'size' bytes are sent, as declared in the Content-Length header.
 
-    :param file_path: The path to the file to be read.
+    :param file: The opened file to be read, closed when the reading is over.
+    :param size: The number of bytes to read.
     :param chunk_size: The size of each chunk to read, in bytes.
+    :param ticket: The stream scheduler ticket, released when the reading is over.
     :return: An iterator over the chunks of the file.
     """
     try:
-        async with aiofiles.open(file_path, 'rb') as file:
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                yield chunk
+        remaining = size
+        while remaining > 0:
+            chunk = await file.read(min(chunk_size, remaining))
+            if not chunk:
+                raise OSError(f"file is {remaining} bytes shorter than declared")
+            remaining -= len(chunk)
+            await ticket.pace(len(chunk))
+            yield chunk
     except OSError as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while reading the file: {e}")
+    finally:
+        await _close_stream(file, ticket)
@@ -0,0 +1,157 @@
+"""
+Build the SQLite catalog database used by the 'sqlite' storage backend and check it against Postgres.
+
+    python -m src.services.sqlite_export manifests  # build from the manifests in the data directory
+    python -m src.services.sqlite_export postgres   # export from Postgres
+    python -m src.services.sqlite_export compare    # check parity and compare latency with Postgres
+"""
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Any
+from sqlalchemy import select
+
+from src.database.config import settings
+from src.database.database import get_engine, session_factory
+from src.database.models import DateOrm, ExchangeOrm, InstrumentOrm
+from src.database.queries import OrmMethods
+from src.database.sqlite_queries import SqliteOrmMethods, SqliteBuilder
+from src.services.data_search import data_search
+from src.services.xml_parser import parse_data
+
+
+async def build_from_manifests(path: str):
+    """
+    Build the SQLite database from the manifests in the data directory.
+    :param path: The file path of the SQLite database.
+    """
+    builder = SqliteBuilder(path)
+    builder.create_tables()
+    await parse_data(builder)
+    builder.finish()
+
+
+async def export_from_postgres(path: str):
+    """
+    Copy the data from Postgres to the SQLite database, primary keys included.
+    :param path: The file path of the SQLite database.
+    """
+    builder = SqliteBuilder(path)
+    builder.create_tables()
+    async with session_factory() as session:
+        for model in (DateOrm, ExchangeOrm, InstrumentOrm):
+            result = await session.execute(select(model))
+            rows = [{column.key: getattr(item, column.key) for column in model.__table__.columns}
+                    for item in result.scalars()]
+            builder.add_rows(model, rows)
+    builder.finish()
+
+
+async def compare_backends(iterations: int) -> bool:
+    """
+    Run the lookups of the three API endpoints against Postgres and SQLite,
+    print the mismatching results and the latency of both backends.
+    :param iterations: How many times each lookup is timed on each backend.
+    :return: True if both backends return the same results.
+    """
+    cases = await _create_cases()
+    if cases is None:
+        print('There is no data in Postgres to compare')
+        return False
+    parity = True
+    for endpoint, search_params_list in cases.items():
+        latency = {OrmMethods: [], SqliteOrmMethods: []}
+        for search_params in search_params_list:
+            results = {}
+            for backend in latency:
+                results[backend] = _normalize(await data_search(search_params, backend))
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await data_search(search_params, backend)
+                    latency[backend].append(time.perf_counter() - start)
+            if results[OrmMethods] != results[SqliteOrmMethods]:
+                parity = False
+                print(f'MISMATCH {endpoint} {search_params}: '
+                      f'postgres={results[OrmMethods]} sqlite={results[SqliteOrmMethods]}')
+
+        print(f'{endpoint}: {len(search_params_list)} lookups')
+        for backend, timings in latency.items():
+            timings.sort()
+            print(f'    {backend.__name__:<18} mean {statistics.mean(timings) * 1000:.3f} ms, '
+                  f'p50 {timings[len(timings) // 2] * 1000:.3f} ms, '
+                  f'p95 {timings[int(len(timings) * 0.95)] * 1000:.3f} ms')
+    return parity
+
+
+async def _create_cases() -> dict[str, list[dict[str, Any]]] | None:
+    """
+    Create the search parameters of every endpoint covering all the data in Postgres, and a miss for each.
+    """
+    async with session_factory() as session:
+        query = (select(DateOrm.date, InstrumentOrm.name, ExchangeOrm.name, InstrumentOrm.iid)
+                 .join(InstrumentOrm.exchange)
+                 .join(ExchangeOrm.date)
+                 )
+        rows = (await session.execute(query)).all()
+    if not rows:
+        return None
+
+    dates = sorted({row[0] for row in rows})
+    pairs = sorted({(row[1], row[2]) for row in rows})
+    missing_date = dates[-1].replace(year=dates[-1].year + 1)
+
+    isin_exists = [{'date': missing_date}]
+    for date in dates:
+        isin_exists.append({'date': date})
+        for instrument, exchange in pairs:
+            isin_exists.append({'date': date, 'instrument': instrument})
+            isin_exists.append({'date': date, 'exchange': exchange})
+            isin_exists.append({'date': date, 'instrument': instrument, 'exchange': exchange})
+
+    isin_exists_interval = []
+    for instrument, exchange in pairs:
+        for date_from, date_to in ((dates[0], dates[-1]), (dates[len(dates) // 2], dates[-1]),
+                                   (missing_date, missing_date)):
+            isin_exists_interval.append({'date_from': date_from, 'date_to': date_to,
+                                         'instrument': instrument, 'exchange': exchange})
+
+    iid_to_isin = [{'date': date, 'iid': iid} for date, iid in sorted({(row[0], row[3]) for row in rows})]
+    iid_to_isin.append({'date': missing_date, 'iid': 0})
+
+    return {
+        '/api/isin_exists': isin_exists,
+        '/api/isin_exists_interval': isin_exists_interval,
+        '/api/iid_to_isin': iid_to_isin,
+    }
+
+
+def _normalize(response) -> list[tuple]:
+    """
+    Turn the found data into a sorted list of the values returned by the API, the order of rows is not defined.
+    """
+    return sorted((item.name, item.exchange.name, item.iid, item.storage_type) for item in response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and check the SQLite catalog database.')
+    parser.add_argument('command', choices=['manifests', 'postgres', 'compare'])
+    parser.add_argument('--path', default=settings.SQLITE_PATH,
+                        help='SQLite database file to build, compare always uses SQLITE_PATH')
+    parser.add_argument('--iterations', type=int, default=100, help='timed runs of each lookup in compare')
+    args = parser.parse_args()
+
+    if args.command == 'manifests':
+        asyncio.run(build_from_manifests(args.path))
+        return
+
+    get_engine().echo = False
+    if args.command == 'postgres':
+        asyncio.run(export_from_postgres(args.path))
+    elif not asyncio.run(compare_backends(args.iterations)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
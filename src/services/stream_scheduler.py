@@ -0,0 +1,339 @@
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from ipaddress import ip_address, ip_network
+from fastapi import HTTPException, Request
+
+from src.database.config import settings
+
+
+class TokenBucket:
+    """
+    Token bucket of bytes, taking more tokens than available puts the bucket in debt
+    and returns the delay needed to pay it off, so any chunk size can be paced.
+    """
+    def __init__(self, rate: int, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: int) -> float:
+        """
+        Take tokens from the bucket.
+        :param amount: The number of tokens (bytes) to take.
+        :return: The delay in seconds before the taken tokens are actually available.
+        """
+        if not self._rate:
+            return 0.0
+        self._refill()
+        self._tokens -= amount
+        return max(0.0, -self._tokens / self._rate)
+
+    def is_full(self) -> bool:
+        if not self._rate:
+            return True
+        self._refill()
+        return self._tokens >= self._burst
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class _ClientState:
+    def __init__(self, rate: int, burst: int, weight: float):
+        self.reserved = 0  # Streams admitted or waiting in the queue
+        self.streaming = 0  # Streams sending data
+        self.bucket = TokenBucket(rate, burst)
+        self.weight = weight
+
+
+class _EgressLink:
+    """
+    Virtual link with the total egress rate, shared between the streams by start-time fair queuing.
+    Every chunk gets a start tag in virtual time, advancing by its size divided by the stream weight,
+    and the link sends the pending chunk with the smallest start tag first.
+    Only the streams with a chunk ready compete for the link, so the share of the streams waiting
+    on a read, on the client or on the client rate limit goes to the other streams.
+    """
+    def __init__(self, rate: int):
+        self._rate = rate
+        self._free_at = 0.0
+        self._virtual_time = 0.0
+        self._pending: list[tuple[float, int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def request(self, nbytes: int, start: float) -> asyncio.Future | None:
+        """
+        Ask the link to send a chunk.
+        :param nbytes: The size of the chunk.
+        :param start: The start tag of the chunk, see start_tag.
+        :return: A future resolved when the chunk may be sent, or None if it may be sent right away.
+        """
+        loop = asyncio.get_running_loop()
+        if not self._pending and self._free_at <= loop.time():
+            self._send(nbytes, start, loop.time())
+            return None
+
+        waiter = loop.create_future()
+        heapq.heappush(self._pending, (start, next(self._order), nbytes, waiter))
+        if self._timer is None:
+            self._timer = loop.call_at(self._free_at, self._dispatch)
+        return waiter
+
+    def start_tag(self, last_finish: float) -> float:
+        """
+        The start tag of the next chunk of a stream, a stream which was idle gets no credit for it.
+        :param last_finish: The finish tag of the previous chunk of the stream.
+        """
+        return max(self._virtual_time, last_finish)
+
+    def _send(self, nbytes: int, start: float, now: float):
+        self._virtual_time = start
+        self._free_at = max(now, self._free_at) + nbytes / self._rate
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        self._timer = None
+        while self._pending:
+            start, _, nbytes, waiter = heapq.heappop(self._pending)
+            if not waiter.done():  # Cancelled waiters do not take the link
+                # The link was busy until now, a late timer must not lose bandwidth
+                self._send(nbytes, start, min(loop.time(), self._free_at))
+                waiter.set_result(None)
+                break
+        if self._pending:
+            self._timer = loop.call_at(self._free_at, self._dispatch)
+
+
+class StreamTicket:
+    """
+    A slot granted by the StreamScheduler to a single stream, paces the stream and releases the slot.
+    """
+    def __init__(self, scheduler: 'StreamScheduler', client: _ClientState):
+        self._scheduler = scheduler
+        self._client = client
+        self._started = False
+        self._released = False
+        self._finish_tag = 0.0
+
+    async def pace(self, nbytes: int):
+        """
+        Wait until the chunk of 'nbytes' can be sent within the client rate limit
+        and the weighted fair share of the total bandwidth of this stream.
+        """
+        if not self._started:
+            self._started = True
+            self._scheduler._start_streaming(self._client)
+
+        delay = self._client.bucket.reserve(nbytes)
+        if delay > 0:
+            await self._scheduler._throttle(asyncio.sleep(delay))
+
+        link = self._scheduler._link
+        if link is not None:
+            # The weight of the client is split between its streams
+            start = link.start_tag(self._finish_tag)
+            self._finish_tag = start + nbytes * self._client.streaming / self._client.weight
+            waiter = link.request(nbytes, start)
+            if waiter is not None:
+                await self._scheduler._throttle(waiter)
+
+    def release(self):
+        """
+        Give the slot back to the scheduler, safe to call more than once.
+        """
+        if self._released:
+            return
+        self._released = True
+        self._scheduler._release(self._client, self._started)
+
+
+class StreamScheduler:
+    """
+    Admission control and bandwidth scheduling for file streams.
+    Limits the number of concurrent streams globally (with a bounded FIFO queue) and per client,
+    limits the byte rate per client with a token bucket and shares the total egress bandwidth
+    between the clients in proportion to their weights, and equally between the streams of each client.
+    """
+    def __init__(self,
+                 max_active: int,
+                 max_queued: int,
+                 queue_timeout: float,
+                 retry_after: int,
+                 max_per_client: int,
+                 client_rate: int,
+                 client_burst: int,
+                 total_rate: int,
+                 weights: dict[str, float],
+                 ):
+        self._max_active = max_active
+        self._max_queued = max_queued
+        self._queue_timeout = queue_timeout
+        self._retry_after = retry_after
+        self._max_per_client = max_per_client
+        self._client_rate = client_rate
+        self._client_burst = client_burst
+        self._weights = weights
+        self._link = _EgressLink(total_rate) if total_rate else None
+
+        self._clients: dict[str, _ClientState] = {}
+        self._waiters: deque[asyncio.Future] = deque()
+        self._active = 0
+        self._streaming_clients = 0
+        self._throttled = 0
+        self._rejected_total = 0
+        self._throttled_total = 0
+
+    async def admit(self, client_key: str) -> StreamTicket:
+        """
+        Admit a new stream of the client, waiting in the queue if all slots are taken.
+        :param client_key: The key identifying the client, see get_client_key.
+        :return: The ticket the stream has to be paced and released with.
+        """
+        client = self._get_client(client_key)
+        if self._max_per_client and client.reserved >= self._max_per_client:
+            self._rejected_total += 1
+            raise HTTPException(status_code=429,
+                                detail="Too many concurrent streams for the client",
+                                headers={'Retry-After': str(self._retry_after)},
+                                )
+
+        client.reserved += 1
+        try:
+            await self._acquire_slot()
+        except BaseException:
+            client.reserved -= 1
+            raise
+        return StreamTicket(self, client)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'active': self._active,
+            'queued': len(self._waiters),
+            'throttled': self._throttled,
+            'clients': self._streaming_clients,
+            'rejected_total': self._rejected_total,
+            'throttled_total': self._throttled_total,
+        }
+
+    async def _acquire_slot(self):
+        if self._active < self._max_active and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self._max_queued:
+            self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self._queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over at the same time, pass it on
+                self._release_slot()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject()
+            raise
+
+    def _reject(self):
+        self._rejected_total += 1
+        raise HTTPException(status_code=503,
+                            detail="Too many concurrent streams",
+                            headers={'Retry-After': str(self._retry_after)},
+                            )
+
+    def _release_slot(self):
+        """
+        Hand the slot over to the first waiter in the queue, or free it.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def _release(self, client: _ClientState, started: bool):
+        client.reserved -= 1
+        if started:
+            client.streaming -= 1
+            if client.streaming == 0:
+                self._streaming_clients -= 1
+        self._release_slot()
+
+    def _start_streaming(self, client: _ClientState):
+        if client.streaming == 0:
+            self._streaming_clients += 1
+        client.streaming += 1
+
+    async def _throttle(self, wait):
+        self._throttled += 1
+        self._throttled_total += 1
+        try:
+            await wait
+        finally:
+            self._throttled -= 1
+
+    def _get_client(self, client_key: str) -> _ClientState:
+        client = self._clients.get(client_key)
+        if client is None:
+            self._prune_clients()
+            client = _ClientState(self._client_rate, self._client_burst, self._weights.get(client_key, 1.0))
+            self._clients[client_key] = client
+        return client
+
+    def _prune_clients(self):
+        """
+        Forget the clients without streams whose token bucket is refilled, they would start over the same.
+        """
+        idle = [key for key, client in self._clients.items() if not client.reserved and client.bucket.is_full()]
+        for key in idle:
+            del self._clients[key]
+
+
+_trusted_proxies = [ip_network(proxy, strict=False) for proxy in settings.STREAM_TRUSTED_PROXIES]
+
+
+def get_client_key(request: Request) -> str:
+    """
+    Identify the client by its API key if the key is valid, otherwise by its IP address.
+    The IP address in X-Real-IP is used only when the request comes from a trusted proxy.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key and api_key in settings.STREAM_API_KEYS:
+        return f'key:{api_key}'
+
+    ip = request.client.host if request.client else 'unknown'
+    real_ip = request.headers.get('X-Real-IP')
+    if real_ip and _is_trusted_proxy(ip):
+        ip = real_ip
+    return f'ip:{ip}'
+
+
+def _is_trusted_proxy(ip: str) -> bool:
+    try:
+        address = ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+stream_scheduler = StreamScheduler(
+    max_active=settings.STREAM_MAX_ACTIVE,
+    max_queued=settings.STREAM_MAX_QUEUED,
+    queue_timeout=settings.STREAM_QUEUE_TIMEOUT,
+    retry_after=settings.STREAM_RETRY_AFTER,
+    max_per_client=settings.STREAM_MAX_PER_CLIENT,
+    client_rate=settings.STREAM_CLIENT_RATE,
+    client_burst=settings.STREAM_CLIENT_BURST,
+    total_rate=settings.STREAM_TOTAL_RATE,
+    weights={f'key:{api_key}': weight for api_key, weight in settings.STREAM_CLIENT_WEIGHTS.items()},
+)
@@ -5,51 +5,79 @@ from inflection import underscore as camel_to_snake
 from sqlalchemy.exc import SQLAlchemyError
 from src.database.queries import OrmMethods
 from src.database.models import *
+from src.services.file_catalog import file_catalog, record_size_from_levels
 
 
-async def parse_data():
+async def parse_data(storage=OrmMethods):
+    """
+    Parse the manifests in the data directory and save their data.
+    :param storage: The storage to save the data to, with an 'add_new_data' method like OrmMethods.
+    """
     try:
         # Parsing the xml files in data directory
-        await _parse_directory('data')
+        await _parse_directory('data', storage)
     except Exception as e:
         raise Exception(f'Error parsing data: {e}')
 
 
-async def _parse_directory(root_dir: str):
+def index_data_files(root_dir: str = 'data'):
+    """
+    Add the '.dat' files described by the manifests to the file catalog, without saving any data.
+    Used when the data is already in a prebuilt storage.
+    :param root_dir: The root directory from which to start the walk.
+    """
+    for subdir, dirs, files in os.walk(root_dir):
+        if 'manifest.xml' in files:
+            path = os.path.join(subdir, 'manifest.xml')
+            try:
+                root = _parse_xml_file(path)
+            except etree.XMLSyntaxError as e:
+                print(f'XML syntax error in {path}: {e}')
+                continue
+            for exchange in root.xpath('.//Exchange'):
+                for instrument in exchange.xpath('.//Instrument'):
+                    _register_data_file(instrument, exchange, subdir)
+
+
+async def _parse_directory(root_dir: str, storage):
     """
     Walk through the directories and parse 'manifest.xml' in each subdirectory.
     :param root_dir: The root directory from which to start the walk.
+    :param storage: The storage to save the data to.
     """
     for subdir, dirs, files in os.walk(root_dir):
         if 'manifest.xml' in files:
             path = os.path.join(subdir, 'manifest.xml')
             try:
                 # Parse the manifest file to extract and save data to the database
-                await _parse_manifest(path)
+                await _parse_manifest(path, storage)
             except etree.XMLSyntaxError as e:
                 print(f'XML syntax error in {path}: {e}')
             except Exception as e:
                 print(f'Error parsing {path}: {e}')
 
 
-async def _parse_manifest(xml_path: str):
+async def _parse_manifest(xml_path: str, storage):
     """
     Parse the XML manifest file,
-    create or update database records for the date, exchanges, and instruments.
+    create or update database records for the date, exchanges, and instruments
+    and add the described '.dat' files to the file catalog.
     :param xml_path: The file path of the manifest XML.
+    :param storage: The storage to save the data to.
     """
     root = _parse_xml_file(xml_path)
 
     # Read Date from file
-    date_pk = await _process_manifest_date(root)
+    date_pk = await _process_manifest_date(root, storage)
 
     #  Read Exchange params from file
     for exchange in root.xpath('.//Exchange'):
-        exchange_pk = await _process_exchange(exchange, date_pk)
+        exchange_pk = await _process_exchange(exchange, date_pk, storage)
 
         #  Read Instrument params from file
         for instrument in exchange.xpath('.//Instrument'):
-            await _process_instrument(instrument, exchange_pk)
+            await _process_instrument(instrument, exchange_pk, storage)
+            _register_data_file(instrument, exchange, os.path.dirname(xml_path))
 
 
 def _parse_xml_file(path: str):
@@ -75,34 +103,37 @@ def _sqlalchemy_exception_handler(func):
 
 
 @_sqlalchemy_exception_handler
-async def _process_manifest_date(root):
+async def _process_manifest_date(root, storage):
     """
     Asynchronously processes and stores date data in the database.
     :param root: An Element object which is the root of the XML tree.
+    :param storage: The storage to save the data to.
     """
     date = root.find('Date').text
     date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
-    return await OrmMethods.add_new_data(DateOrm, {'date': date})
+    return await storage.add_new_data(DateOrm, {'date': date})
 
 
 @_sqlalchemy_exception_handler
-async def _process_exchange(exchange, date_pk):
+async def _process_exchange(exchange, date_pk, storage):
     """
     Asynchronously processes and stores exchange data in the database with associated date primary key.
     :param exchange: The object representing the exchange.
     :param date_pk: The primary key (integer) of the date to which this exchange belongs.
+    :param storage: The storage to save the data to.
     """
     attributes = _get_attributes(exchange, ['Name', 'Location'])
     attributes['date_id'] = date_pk
-    return await OrmMethods.add_new_data(ExchangeOrm, attributes)
+    return await storage.add_new_data(ExchangeOrm, attributes)
 
 
 @_sqlalchemy_exception_handler
-async def _process_instrument(instrument, exchange_pk):
+async def _process_instrument(instrument, exchange_pk, storage):
     """
     Asynchronously processes and stores instrument data in the database with associated exchange primary key.
     :param instrument: The object representing the instrument.
     :param exchange_pk: The primary key (integer) of the exchange to which this instrument belongs.
+    :param storage: The storage to save the data to.
     """
     attributes: dict[str, Any] = _get_attributes(
         instrument,
@@ -114,7 +145,20 @@ async def _process_instrument(instrument, exchange_pk):
     attributes['available_interval_end'] = (
         datetime.datetime.strptime(attributes['available_interval_end'], '%H:%M').time())
     attributes['exchange_id'] = exchange_pk
-    await OrmMethods.add_new_data(InstrumentOrm, attributes)
+    await storage.add_new_data(InstrumentOrm, attributes)
+
+
+def _register_data_file(instrument, exchange, dir_path: str):
+    """
+    Adds the '.dat' file of the instrument to the file catalog.
+    Unreadable levels leave the record size unknown, the catalog never fails the ingestion.
+    :param instrument: The object representing the instrument.
+    :param exchange: The object representing the exchange the instrument belongs to.
+    :param dir_path: The directory of the manifest, which also holds the '.dat' files.
+    """
+    filename = f"{instrument.get('Name')}@{exchange.get('Name')}.dat"
+    record_size = record_size_from_levels(instrument.get('Levels'))
+    file_catalog.register(os.path.join(dir_path, filename), record_size)
 
 
 def _get_attributes(element, attrs: list[str]) -> dict[str, str]:
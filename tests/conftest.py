@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# The settings are read on import, select the embedded storage before any 'src' module is imported
+os.environ['STORAGE_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'catalog.sqlite3')
@@ -0,0 +1,178 @@
+import os
+import asyncio
+
+import pytest
+from lxml import etree
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.database.config import settings
+from src.database.database import get_engine
+from src.database.models import DateOrm
+from src.database.queries import OrmMethods
+from src.database.sqlite_queries import sqlite_engine
+from src.router.router_api import isin_exists, isin_exists_interval, iid_to_isin
+from src.schema import (Payload,
+                        IsinExistsFilterSchema,
+                        IsinExistsIntervalFilterSchema,
+                        IidToIsinFilterSchema,
+                        )
+from src.services.sqlite_export import build_from_manifests, compare_backends
+from src.services.xml_parser import parse_data
+
+
+# date: {exchange: [(instrument, storage_type, levels, iid)]}, same layout as task/generate_bin.py
+MANIFESTS = {
+    '2023-12-29': {
+        'Binance.spot': [('BTCETH', 'raw', '[0, 1, 2, 3]', 79)],
+        'Okex.spot': [('BTCETH', 'compressed', '[1, 2]', 146)],
+    },
+    '2024-01-02': {
+        'Binance.spot': [('BTCETH', 'lite', '[0, 1, 2, 3]', 79)],
+        'Kucoin.spot': [('ETH_USDT', 'raw', '[0, 1, 2, 3, 4]', 110)],
+    },
+    '2024-01-10': {
+        'Binance.spot': [('BTCETH', 'raw', '[0, 1, 2, 3]', 80)],
+        'Binance.fut': [('BTCETH_PERP', 'lite', '[0, 1, 2, 3]', 174)],
+    },
+}
+
+
+def _write_manifests(root_dir):
+    for date, exchanges in MANIFESTS.items():
+        year, month, day = (str(int(part)) for part in date.split('-'))
+        path = os.path.join(root_dir, 'data', year, month, day)
+        os.makedirs(path)
+
+        root = etree.Element('ManifestRoot')
+        etree.SubElement(root, 'Date').text = date
+        exchanges_element = etree.SubElement(root, 'Exchanges')
+        for exchange, instruments in exchanges.items():
+            exchange_element = etree.SubElement(exchanges_element, 'Exchange',
+                                                {'Name': exchange, 'Location': 'london'})
+            instruments_element = etree.SubElement(exchange_element, 'Instruments')
+            for name, storage_type, levels, iid in instruments:
+                etree.SubElement(instruments_element, 'Instrument', {
+                    'Name': name,
+                    'StorageType': storage_type,
+                    'Levels': levels,
+                    'Iid': str(iid),
+                    'AvailableIntervalBegin': '9:30',
+                    'AvailableIntervalEnd': '18:05',
+                })
+        etree.ElementTree(root).write(os.path.join(path, 'manifest.xml'), pretty_print=True)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def data_dir(tmp_path_factory):
+    """
+    Write the manifests and build the SQLite database from them, the parser reads 'data' in the working directory.
+    """
+    root_dir = tmp_path_factory.mktemp('manifests')
+    _write_manifests(root_dir)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(root_dir)
+        asyncio.run(build_from_manifests(settings.SQLITE_PATH))
+        yield root_dir
+
+
+def _sorted(payloads: list[Payload]) -> list[Payload]:
+    """
+    The order of the found data is not defined.
+    """
+    return sorted(payloads,
+                  key=lambda payload: (payload.instrument, payload.exchange, payload.iid, payload.storage_type))
+
+
+def _payloads(*items) -> list[Payload]:
+    return _sorted([Payload(instrument=instrument, exchange=exchange, iid=iid, storage_type=storage_type)
+                    for instrument, exchange, iid, storage_type in items])
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'date': '2023-12-29'},
+     [('BTCETH', 'Binance.spot', 79, 'raw'), ('BTCETH', 'Okex.spot', 146, 'compressed')]),
+    ({'date': '2024-01-02', 'instrument': 'ETH_USDT'},
+     [('ETH_USDT', 'Kucoin.spot', 110, 'raw')]),
+    ({'date': '2024-01-10', 'exchange': 'Binance.fut'},
+     [('BTCETH_PERP', 'Binance.fut', 174, 'lite')]),
+    ({'date': '2023-12-29', 'instrument': 'BTCETH', 'exchange': 'Okex.spot'},
+     [('BTCETH', 'Okex.spot', 146, 'compressed')]),
+    ({'date': '2024-01-05'}, []),
+])
+def test_isin_exists(params, expected):
+    response = asyncio.run(isin_exists(IsinExistsFilterSchema(**params)))
+    assert _sorted(response) == _payloads(*expected)
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'date_from': '2023-12-01', 'date_to': '2024-01-31', 'instrument': 'BTCETH', 'exchange': 'Binance.spot'},
+     [('BTCETH', 'Binance.spot', 79, 'raw'), ('BTCETH', 'Binance.spot', 79, 'lite'),
+      ('BTCETH', 'Binance.spot', 80, 'raw')]),
+    ({'date_from': '2024-01-02', 'date_to': '2024-01-10', 'instrument': 'BTCETH', 'exchange': 'Binance.spot'},
+     [('BTCETH', 'Binance.spot', 79, 'lite'), ('BTCETH', 'Binance.spot', 80, 'raw')]),
+    ({'date_from': '2024-01-03', 'date_to': '2024-01-09', 'instrument': 'BTCETH', 'exchange': 'Binance.spot'},
+     []),
+])
+def test_isin_exists_interval(params, expected):
+    response = asyncio.run(isin_exists_interval(IsinExistsIntervalFilterSchema(**params)))
+    assert _sorted(response) == _payloads(*expected)
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'date': '2023-12-29', 'iid': 146}, [('BTCETH', 'Okex.spot', 146, 'compressed')]),
+    ({'date': '2024-01-10', 'iid': 80}, [('BTCETH', 'Binance.spot', 80, 'raw')]),
+    ({'date': '2024-01-10', 'iid': 79}, []),
+])
+def test_iid_to_isin(params, expected):
+    response = asyncio.run(iid_to_isin(IidToIsinFilterSchema(**params)))
+    assert _sorted(response) == _payloads(*expected)
+
+
+def test_sqlite_is_read_only():
+    with Session(sqlite_engine) as session:
+        with pytest.raises(OperationalError):
+            session.execute(delete(DateOrm))
+            session.commit()
+
+
+def test_sqlite_is_self_contained():
+    """
+    The built database does not use WAL, it can be opened read-only from a read-only directory.
+    """
+    assert not os.path.exists(f'{settings.SQLITE_PATH}-wal')
+    with sqlite_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == 'delete'
+
+
+def test_postgres_parity():
+    """
+    Load the same manifests into Postgres and compare every lookup of the three endpoints with SQLite.
+    Like the application startup, this drops and recreates the tables of the configured Postgres database,
+    so it only runs with TEST_POSTGRES=1.
+    """
+    if os.environ.get('TEST_POSTGRES') != '1':
+        pytest.skip('Set TEST_POSTGRES=1 to recreate the tables of the configured Postgres database')
+    if settings.POSTGRES_USER is None or settings.DB_HOST is None:
+        pytest.skip('Postgres is not configured')
+
+    async def run():
+        try:
+            async with asyncio.timeout(5):
+                async with get_engine().connect():
+                    pass
+        except Exception:
+            return None
+        try:
+            await OrmMethods.delete_tables()
+            await OrmMethods.create_tables()
+            await parse_data()
+            return await compare_backends(iterations=1)
+        finally:
+            await get_engine().dispose()
+
+    parity = asyncio.run(run())
+    if parity is None:
+        pytest.skip('Postgres is not reachable')
+    assert parity